@@ -1,30 +1,26 @@
 # app.py
 import streamlit as st
 from auth import login
-from database import init_db, Session, User, Emission
+from database import init_db, Session, User, Emission, factor_on
 from datetime import date
+from sqlalchemy import func
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 import plotly.express as px
-import plotly.io as pio
-import io, zipfile
 import plotly.graph_objects as go
+import os
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from emission_buffer import EmissionBuffer, register_buffer, live_buffers
+from reports import emissions_frame, report_csv, report_images, report_zip
+from factors import (
+    FACILITIES, MONTHS, CATEGORIES, SAFE_LIMITS, f_e_f, of_e_f,
+    flight_emissions, train_emission_factors, personal_emission_factors,
+    bus_emission_factors, taxi_emission_factors, join_subtype
+)
 
-FACILITIES = [
-    "Residential Areas",
-    "Hostels",
-    "Academic Area",
-    "Health Centre",
-    "Schools",
-    "Visitor's Hostel",
-    "Servants Quarters",
-    "Shops/Bank/PO"
-]
-MONTHS = [
-    "January","February","March","April","May","June",
-    "July","August","September","October","November","December"
-]
+# Usernames allowed to see the Admin page, e.g. CARBONF_ADMINS="alice,bob"
+ADMIN_USERS = {u.strip() for u in os.environ.get("CARBONF_ADMINS", "").split(",") if u.strip()}
 
 # Centering + Card Shadow styling
 st.markdown("""
@@ -86,68 +82,44 @@ if not st.session_state.get("started"):
     st.stop()
 
 # 4. Sidebar menu
-menu = st.sidebar.radio("Navigate", [
+pages = [
     "Carbon Data",
     "Carbon Metre",
     "Emission Analysis",
     "Year and Facility Analysis",
     "Download",
     "Offset Contribution"
-])
+]
+if name in ADMIN_USERS:
+    pages.append("Admin")
+menu = st.sidebar.radio("Navigate", pages)
 
 # 5. Get DB session & current user
 db = Session()
 user = db.query(User).filter_by(name=name).first()
 
-# Emission factor dictionaries
-emission_factors = {
-    "Fossil Fuels": {"CNG": 2.21},
-    "Fossil Fuels per litre": {"Petrol/Gasoline": 2.315, "Diesel": 2.68, "LPG": 1.51},
-    "Fossil Fuels per scm": {"PNG": 2.1},
-    "Electricity": {"Coal/Thermal": 0.85, "Solar": 0.00}
-}
-f_e_f = {
-    "Domestic Refrigeration": 1430,
-    "Commercial Refrigeration": 3922,
-    "Industrial Refrigeration": 2088,
-    "Residential and Commercial A/C": 1650
-}
-of_e_f = {
-    "tree": 1.75,
-    "soil": 0.0515,
-    "grass": 0.0309,
-    "water": 0.0412
-}
-e_e_f = {
-    "Coal/Thermal": 0.92,
-    "Solar": 0.05
-}
-w_e_f = 0.344
-wa_e_f = {
-    "Household Residue": {"Landfills": 1.0, "Combustion": 0.7, "Recycling": 0.2, "Composting": 0.1},
-    "Food and Drink Waste": {"Landfills": 1.9, "Combustion": 0.8, "Recycling": 0.3, "Composting": 0.05},
-    "Garden Waste": {"Landfills": 0.6, "Combustion": 0.4, "Recycling": 0.2, "Composting": 0.03},
-    "Commercial and Industrial Waste": {"Landfills": 2.0, "Combustion": 1.5, "Recycling": 0.6, "Composting": 0.2}
-}
-SAFE_LIMITS = {
-    "Fossil Fuels": 5000,
-    "Fugitive": 3000,
-    "Electricity": 4000,
-    "Water": 2000,
-    "Waste": 1500,
-    "Travel": 3500
-}
-def log_emission(category, facility, year, month, value):
+def log_emission(category, facility, year, month, value, subtype=None, unit=None, amount=None):
     entry = Emission(
         user_id=user.id,
         date=date(int(year), MONTHS.index(month)+1, 1),
         facility=facility,
         category=category,
-        value=value
+        value=value,
+        subtype=subtype,
+        unit=unit,
+        amount=amount
     )
     db.add(entry)
     db.commit()
 
+def dated_emission(category, subtype, unit, amount, year, month):
+    # Use the factor in effect for the entry's month, the same one recompute.py would apply
+    as_of = date(int(year), MONTHS.index(month)+1, 1) if month in MONTHS and year > 0 else date.today()
+    factor = factor_on(db, (category, subtype, unit), as_of)
+    if factor is None:
+        return None
+    return amount * factor
+
 def plot_gauge(current_value, category, safe_limit):
     icon = CATEGORY_ICONS.get(category, "🌍")  # default globe if not found
     title_text = f"{icon} {category}"
@@ -173,20 +145,42 @@ def plot_gauge(current_value, category, safe_limit):
         }
     ))
     
-    fig.update_traces(
-        selector=dict(type='indicator'),
-        gauge_animation_duration=1000  # 1000 ms = 1 second animation
-    )
     fig.update_layout(
         margin = {'t': 40, 'b': 0, 'l': 0, 'r': 0},
-        height=300
+        height=300,
         transition = {'duration': 1000, 'easing': 'cubic-in-out'}
     )
     return fig
 
+def plot_campus_heatmap(totals):
+    # totals: FACILITIES x CATEGORIES array of kg CO₂, coloured by share of the safe limit
+    limits = np.array([SAFE_LIMITS[c] for c in CATEGORIES], dtype=float)
+    fig = go.Figure(go.Heatmap(
+        z = totals / limits,
+        x = [f"{CATEGORY_ICONS.get(c, '🌍')} {c}" for c in CATEGORIES],
+        y = FACILITIES,
+        text = [[f"{v:,.0f} kg" for v in row] for row in totals],
+        texttemplate = "%{text}",
+        zmin = 0,
+        zmax = 1.5,  # same range as the gauges: up to 150% of the safe limit
+        colorscale = [[0, "lightgreen"], [0.66, "khaki"], [0.67, "salmon"], [1, "red"]],
+        colorbar = {'title': 'Safe limit', 'tickformat': '.0%'},
+        hovertemplate = "%{y}<br>%{x}<br>%{text} (%{z:.0%} of safe limit)<extra></extra>"
+    ))
+    fig.update_layout(
+        title = "<b>Campus Carbon Metre</b>",
+        yaxis = {'autorange': 'reversed'},
+        margin = {'t': 50, 'b': 0, 'l': 0, 'r': 0},
+        height = 450
+    )
+    return fig
+
 # Initialize session state for emissions log
 if "emission_log" not in st.session_state:
-    st.session_state.emission_log = []
+    st.session_state.emission_log = EmissionBuffer(owner=name)
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        register_buffer(ctx.session_id, st.session_state.emission_log)
 
 # 6. Handle each menu choice
 if menu == "Carbon Data":
@@ -211,30 +205,13 @@ if menu == "Carbon Data":
             elif fuel_type == "Choose Fuel Type" or unit == "Choose Unit":
                 st.warning("Please select fuel type and unit.")
             else:
-                factor = None
-                amt = amount_consumed
-                if unit == "Tonne":
-                    amt *= 1000  # convert to kg
-                    factor = emission_factors["Fossil Fuels"].get(fuel_type)
-                elif unit == "litre":
-                    factor = emission_factors["Fossil Fuels per litre"].get(fuel_type)
-                elif unit == "SCM":
-                    factor = emission_factors["Fossil Fuels per scm"].get(fuel_type)
-                elif unit == "Kg":
-                    factor = emission_factors["Fossil Fuels"].get(fuel_type)
-                if factor is not None:
-                    carbon_footprint = amt * factor
+                carbon_footprint = dated_emission("Fossil Fuels", fuel_type, unit, amount_consumed, year, month)
+                if carbon_footprint is not None:
                     st.success(f"Your estimated CO₂ emission: **{carbon_footprint:.2f} kg**")
                     st.session_state["Fossil Fuels Emission"] = carbon_footprint
                     if facility != "Choose Facility" and month != "Choose Month":
-                        log_emission("Fossil Fuels", facility, year, month, carbon_footprint)
-                        st.session_state.emission_log.append({
-                            "Year": year,
-                            "Month": month,
-                            "Facility": facility,
-                            "Factor": "Fossil Fuels",
-                            "Emission": carbon_footprint
-                        })
+                        log_emission("Fossil Fuels", facility, year, month, carbon_footprint, fuel_type, unit, amount_consumed)
+                        st.session_state.emission_log.append(year, month, facility, "Fossil Fuels", carbon_footprint)
 
     # Fugitive
     with st.expander("Fugitive"):
@@ -247,25 +224,15 @@ if menu == "Carbon Data":
         if submitted2:
             if facility == "Choose Facility" or month == "Choose Month":
                 st.warning("Please select facility and month.")
-            elif application_type == "Choose Application Type":
-                st.warning("Please select an application type.")
+            elif application_type == "Choose Application Type" or unit2 == "Choose Unit":
+                st.warning("Please select an application type and unit.")
             else:
-                gwp_factor = f_e_f.get(application_type, 0)
-                units_consumed = amt2
-                if unit2 == "Tonne":
-                    units_consumed *= 1000  # Convert to kg
-                fugitive_emission = units_consumed * gwp_factor
+                fugitive_emission = dated_emission("Fugitive", application_type, unit2, amt2, year, month)
                 st.success(f"Your estimated CO₂ equivalent emission: **{fugitive_emission:.2f} kg**")
                 st.session_state["Fugitive Emission"] = fugitive_emission
                 if facility != "Choose Facility" and month != "Choose Month":
-                    log_emission("Fugitive", facility, year, month, fugitive_emission)
-                    st.session_state.emission_log.append({
-                        "Year": year,
-                        "Month": month,
-                        "Facility": facility,
-                        "Factor": "Fugitive",
-                        "Emission": fugitive_emission
-                    })
+                    log_emission("Fugitive", facility, year, month, fugitive_emission, application_type, unit2, amt2)
+                    st.session_state.emission_log.append(year, month, facility, "Fugitive", fugitive_emission)
 
     # Electricity
     with st.expander("Electricity"):
@@ -282,19 +249,12 @@ if menu == "Carbon Data":
             elif electricity_type == "Choose electricity Type":
                 st.warning("Please select electricity type.")
             else:
-                emission_factor = e_e_f.get(electricity_type, 0)
-                electricity_emission = amt3 * emission_factor
+                electricity_emission = dated_emission("Electricity", electricity_type, "KWH", amt3, year, month)
                 st.success(f"Your estimated CO₂ equivalent emission: **{electricity_emission:.2f} kg**")
                 st.session_state["Electricity Emission"] = electricity_emission
                 if facility != "Choose Facility" and month != "Choose Month":
-                    log_emission("Electricity", facility, year, month, electricity_emission)
-                    st.session_state.emission_log.append({
-                        "Year": year,
-                        "Month": month,
-                        "Facility": facility,
-                        "Factor": "Electricity",
-                        "Emission": electricity_emission
-                    })
+                    log_emission("Electricity", facility, year, month, electricity_emission, electricity_type, "KWH", amt3)
+                    st.session_state.emission_log.append(year, month, facility, "Electricity", electricity_emission)
 
     # Water
     with st.expander("Water"):
@@ -308,23 +268,15 @@ if menu == "Carbon Data":
         if submitted4:
             if facility == "Choose Facility" or month == "Choose Month":
                 st.warning("Please select facility and month.")
+            elif water_type == "Choose Water Type" or unit4 == "Choose Unit":
+                st.warning("Please select water type and unit.")
             else:
-                water_emission = 0.0
-                if unit4 == "Cubic metre":
-                    water_emission = amt4 * w_e_f
-                elif unit4 == "million litres":
-                    water_emission = amt4 * 1000 * w_e_f
+                water_emission = dated_emission("Water", water_type, unit4, amt4, year, month)
                 st.success(f"Your estimated CO₂ equivalent emission from water usage is: **{water_emission:.2f} kg**")
                 st.session_state["Water Emission"] = water_emission
                 if facility != "Choose Facility" and month != "Choose Month":
-                    log_emission("Water", facility, year, month, water_emission)
-                    st.session_state.emission_log.append({
-                        "Year": year,
-                        "Month": month,
-                        "Facility": facility,
-                        "Factor": "Water",
-                        "Emission": water_emission
-                    })
+                    log_emission("Water", facility, year, month, water_emission, water_type, unit4, amt4)
+                    st.session_state.emission_log.append(year, month, facility, "Water", water_emission)
 
     # Waste
     with st.expander("Waste"):
@@ -339,73 +291,53 @@ if menu == "Carbon Data":
         if submitted5:
             if facility == "Choose Facility" or month == "Choose Month":
                 st.warning("Please select facility and month.")
-            elif waste_type == "Choose Waste Type" or treatment_type == "Choose Treatment Type":
-                st.warning("Please select waste type and treatment type.")
+            elif waste_type == "Choose Waste Type" or treatment_type == "Choose Treatment Type" or unit5 == "Choose Unit":
+                st.warning("Please select waste type, treatment type and unit.")
             else:
-                emission_factor = wa_e_f.get(waste_type, {}).get(treatment_type, 0)
-                amount_kg = amt5
-                if unit5 == "Tonne":
-                    amount_kg = amt5 * 1000
-                waste_emission = amount_kg * emission_factor
+                waste_emission = dated_emission("Waste", join_subtype(waste_type, treatment_type), unit5, amt5, year, month)
                 st.success(f"Your estimated CO₂ equivalent emission from waste is: **{waste_emission:.2f} kg**")
                 st.session_state["Waste Emission"] = waste_emission
                 if facility != "Choose Facility" and month != "Choose Month":
-                    log_emission("Waste", facility, year, month, waste_emission)
-                    st.session_state.emission_log.append({
-                        "Year": year,
-                        "Month": month,
-                        "Facility": facility,
-                        "Factor": "Waste",
-                        "Emission": waste_emission
-                    })
+                    log_emission("Waste", facility, year, month, waste_emission, join_subtype(waste_type, treatment_type), unit5, amt5)
+                    st.session_state.emission_log.append(year, month, facility, "Waste", waste_emission)
 
     # Travel
     with st.expander("Travel"):
         st.subheader("Travel Emissions")
         with st.form("travel_form"):
             travel_mode = st.selectbox("Mode of Transport", ["Choose Mode of Transport", "Airways", "Roadways", "Railways"])
-            emission = 0.0
-            flight_emissions = {"Short Haul": 0.15, "Long Haul": 0.11, "Domestic": 0.18, "International": 0.13}
-            train_emission_factors = {"Electric": 0.035, "Diesel": 0.06, "Hydrogen": 0.04}
-            personal_emission_factors = {"Small Sized Car": 0.12, "Medium Sized Car": 0.17, "Large Sized Car": 0.22, "Motorcycle": 0.09}
-            bus_emission_factors = {"Electricity": 0.03, "Diesel": 0.09, "Hydrogen": 0.05}
-            taxi_emission_factors = {"Electricity": 0.06, "Petrol": 0.16, "Hydrogen": 0.07, "CNG": 0.13}
+            travel_subtype = None
+            distance = 0.0
 
             if travel_mode == "Airways":
-                flight_length = st.selectbox("Flight Length", ["Short Haul", "Long Haul", "Domestic", "International"])
+                flight_length = st.selectbox("Flight Length", list(flight_emissions))
                 distance = st.number_input("Enter distance traveled (km)", min_value=0.0, step=1.0)
-                if distance:
-                    emission = distance * flight_emissions.get(flight_length, 0)
+                travel_subtype = join_subtype("Airways", flight_length)
             elif travel_mode == "Railways":
                 rail_type = st.selectbox("Rail Type", ["Metro", "National Railways"])
                 if rail_type == "Metro":
                     distance = st.number_input("Enter distance traveled (km)", min_value=0.0, step=1.0)
-                    if distance:
-                        emission = distance * 0.04
+                    travel_subtype = join_subtype("Railways", "Metro")
                 elif rail_type == "National Railways":
-                    train_type = st.selectbox("Train Type", ["Electric", "Diesel", "Hydrogen"])
+                    train_type = st.selectbox("Train Type", list(train_emission_factors))
                     distance = st.number_input("Enter distance traveled (km)", min_value=0.0, step=1.0)
-                    if distance:
-                        emission = distance * train_emission_factors.get(train_type, 0)
+                    travel_subtype = join_subtype("Railways", train_type)
             elif travel_mode == "Roadways":
                 ownership = st.selectbox("Vehicle Ownership", ["Public", "Personal"])
                 if ownership == "Personal":
-                    vehicle_type = st.selectbox("Vehicle Type", ["Small Sized Car", "Medium Sized Car", "Large Sized Car", "Motorcycle"])
+                    vehicle_type = st.selectbox("Vehicle Type", list(personal_emission_factors))
                     distance = st.number_input("Enter distance traveled (km)", min_value=0.0, step=1.0)
-                    if distance:
-                        emission = distance * personal_emission_factors.get(vehicle_type, 0)
+                    travel_subtype = join_subtype("Personal", vehicle_type)
                 elif ownership == "Public":
                     vehicle_type = st.selectbox("Vehicle Type", ["Bus", "Taxi"])
                     if vehicle_type == "Bus":
-                        bus_fuel = st.selectbox("Bus Runs On", ["Electricity", "Diesel", "Hydrogen"])
+                        bus_fuel = st.selectbox("Bus Runs On", list(bus_emission_factors))
                         distance = st.number_input("Enter distance traveled (km)", min_value=0.0, step=1.0)
-                        if distance:
-                            emission = distance * bus_emission_factors.get(bus_fuel, 0)
+                        travel_subtype = join_subtype("Bus", bus_fuel)
                     elif vehicle_type == "Taxi":
-                        taxi_fuel = st.selectbox("Taxi Runs On", ["Electricity", "Petrol", "Hydrogen", "CNG"])
+                        taxi_fuel = st.selectbox("Taxi Runs On", list(taxi_emission_factors))
                         distance = st.number_input("Enter distance traveled (km)", min_value=0.0, step=1.0)
-                        if distance:
-                            emission = distance * taxi_emission_factors.get(taxi_fuel, 0)
+                        travel_subtype = join_subtype("Taxi", taxi_fuel)
             submitted6 = st.form_submit_button("Submit Travel Data")
         if submitted6:
             if facility == "Choose Facility" or month == "Choose Month":
@@ -413,63 +345,80 @@ if menu == "Carbon Data":
             elif travel_mode == "Choose Mode of Transport":
                 st.warning("Please select a mode of transport.")
             else:
+                emission = 0.0
+                if travel_subtype and distance:
+                    emission = dated_emission("Travel", travel_subtype, "km", distance, year, month)
                 st.success(f"Your estimated CO₂ emission from travel is: **{emission:.2f} kg**")
                 st.session_state["Travel Emission"] = emission
                 if facility != "Choose Facility" and month != "Choose Month":
-                    log_emission("Travel", facility, year, month, emission)
-                    st.session_state.emission_log.append({
-                        "Year": year,
-                        "Month": month,
-                        "Facility": facility,
-                        "Factor": "Travel",
-                        "Emission": emission
-                    })
+                    log_emission("Travel", facility, year, month, emission, travel_subtype, "km", distance)
+                    st.session_state.emission_log.append(year, month, facility, "Travel", emission)
 elif menu == "Carbon Metre":
     st.header("Carbon Footprint Summary")
 
-    # Year/Month/Facility Filters
+    # Year/Month filters shared by both views
     col1, col2 = st.columns(2)
     with col1:
-        selected_facility = st.selectbox("Facility", ["Choose Facility"] + FACILITIES)
-        selected_year = st.number_input("Year", min_value=0, format="%d", value=date.today().year)
+        selected_year = st.number_input("Year", min_value=0, format="%d", value=date.today().year, key="metre_year")
     with col2:
-        selected_month = st.selectbox("Select Month", ["Choose Month"] + MONTHS)
-
-    if (
-        selected_facility != "Choose Facility" and
-        selected_month != "Choose Month" and
-        selected_year > 0
-    ):
-        # Initialize totals per category
-        category_totals = {cat: 0.0 for cat in SAFE_LIMITS}
-
-        for entry in st.session_state.emission_log:
-            if (
-                str(entry["Year"]) == str(selected_year) and
-                entry["Month"] == selected_month and
-                entry["Facility"] == selected_facility
-            ):
-                if entry["Factor"] in category_totals:
-                    category_totals[entry["Factor"]] += abs(entry["Emission"])
-
-        # Display gauge meters
-        cols = st.columns(3)
-        for idx, (category, emission) in enumerate(category_totals.items()):
-            with columns[idx % 3]:
-                with st.container():
-                    st.markdown('<div class="centered">', unsafe_allow_html=True)
-                    fig = plot_gauge(emission, category, SAFE_LIMITS[category])
-                    st.plotly_chart(fig, use_container_width=True)
-                    custom_progress_bar(emission, SAFE_LIMITS[category])
-
-                    if emission <= SAFE_LIMITS[category]:
-                        st.success(f"✅ {category} emissions within limits.")
-                    else:
-                        excess = emission - SAFE_LIMITS[category]
-                        st.error(f"🚨 Exceeded {excess/1000:.2f} tons in {category} emissions.")
-                    st.markdown('</div>', unsafe_allow_html=True)
+        selected_month = st.selectbox("Select Month", ["Choose Month"] + MONTHS, key="metre_month")
+    view = st.radio("View", ["Campus Overview", "Facility Gauges"], horizontal=True, key="metre_view")
+
+    if selected_month != "Choose Month" and selected_year > 0:
+        # One grouped query for every facility x category in the month
+        month_start = date(int(selected_year), MONTHS.index(selected_month)+1, 1)
+        month_end = date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+        rows = (db.query(Emission.facility, Emission.category, func.sum(func.abs(Emission.value)))
+                  .filter(Emission.user_id==user.id, Emission.date >= month_start, Emission.date < month_end)
+                  .group_by(Emission.facility, Emission.category)
+                  .all())
+        totals = np.zeros((len(FACILITIES), len(CATEGORIES)))
+        for fac, category, total in rows:
+            if fac in FACILITIES and category in CATEGORIES:
+                totals[FACILITIES.index(fac), CATEGORIES.index(category)] = total
+
+        if view == "Campus Overview":
+            st.plotly_chart(plot_campus_heatmap(totals), use_container_width=True)
+            over = totals > np.array([SAFE_LIMITS[c] for c in CATEGORIES])
+            if over.any():
+                st.error(f"🚨 {int(over.sum())} facility/category combinations exceeded their safe limit.")
+            else:
+                st.success("✅ All facilities within limits.")
+
+            def drill_down():
+                st.session_state.metre_view = "Facility Gauges"
+                st.session_state.metre_facility = st.session_state.metre_drill_facility
+
+            dcol1, dcol2 = st.columns([3, 1])
+            with dcol1:
+                st.selectbox("Drill down into facility", FACILITIES, key="metre_drill_facility")
+            with dcol2:
+                st.button("Show gauges", on_click=drill_down)
+        else:
+            selected_facility = st.selectbox("Facility", ["Choose Facility"] + FACILITIES, key="metre_facility")
+            if selected_facility != "Choose Facility":
+                category_totals = dict(zip(CATEGORIES, totals[FACILITIES.index(selected_facility)]))
+
+                # Display gauge meters
+                cols = st.columns(3)
+                for idx, (category, emission) in enumerate(category_totals.items()):
+                    with cols[idx % 3]:
+                        with st.container():
+                            st.markdown('<div class="centered">', unsafe_allow_html=True)
+                            fig = plot_gauge(emission, category, SAFE_LIMITS[category])
+                            st.plotly_chart(fig, use_container_width=True)
+                            custom_progress_bar(emission, SAFE_LIMITS[category])
+
+                            if emission <= SAFE_LIMITS[category]:
+                                st.success(f"✅ {category} emissions within limits.")
+                            else:
+                                excess = emission - SAFE_LIMITS[category]
+                                st.error(f"🚨 Exceeded {excess/1000:.2f} tons in {category} emissions.")
+                            st.markdown('</div>', unsafe_allow_html=True)
+            else:
+                st.info("Please select a facility.")
     else:
-        st.info("Please select a facility, month, and valid year.")
+        st.info("Please select a month and valid year.")
 
 elif menu == "Emission Analysis":
     emissions = {
@@ -574,31 +523,13 @@ elif menu == "Download":
     st.header("Download Reports")
     # Prepare CSV of all data
     records = db.query(Emission).filter(Emission.user_id==user.id).all()
-    df_all = pd.DataFrame([{"Year": rec.date.year, "Month": rec.date.month, "Facility": rec.facility,
-                            "Category": rec.category, "Emission": rec.value} for rec in records])
-    csv = df_all.to_csv(index=False).encode('utf-8')
+    df_all = emissions_frame(records)
+    csv = report_csv(df_all)
     st.download_button("📥 Download CSV", data=csv, file_name="emissions.csv", mime="text/csv")
     # Generate charts and zip
     if not df_all.empty:
-        # Bar and pie
-        summary = df_all.groupby("Category")["Emission"].sum().reset_index()
-        fig_bar = px.bar(summary, x="Category", y="Emission", title="Emissions by Category", color="Category", template="plotly_white")
-        fig_pie = px.pie(summary, values="Emission", names="Category", title="Emissions Distribution", hole=0.4)
-        # Monthly trend
-        df_all["MonthName"] = df_all["Month"].apply(lambda m: ["January","February","March","April","May","June","July","August","September","October","November","December"][m-1])
-        monthly = df_all.groupby(["Year","MonthName"])["Emission"].sum().reset_index()
-        fig1 = px.line(monthly, x="MonthName", y="Emission", color="Year", markers=True, title="Monthly Emission Trend")
-        fig1.update_xaxes(categoryorder="array", categoryarray=["January","February","March","April","May","June","July","August","September","October","November","December"])
-        # Create ZIP
-        buf = io.BytesIO()
-        with zipfile.ZipFile(buf, 'w') as z:
-            z.writestr("emissions.csv", csv.decode('utf-8'))
-            charts = {"bar_chart.png": fig_bar, "pie_chart.png": fig_pie, "monthly_trend.png": fig1}
-            for name, fig in charts.items():
-                img_buf = pio.to_image(fig, format='png')
-                z.writestr(name, img_buf)
-        buf.seek(0)
-        st.download_button("📥 Download All Charts and Data (ZIP)", data=buf.getvalue(), file_name="reports.zip", mime="application/zip")
+        zip_bytes = report_zip(csv, report_images(df_all))
+        st.download_button("📥 Download All Charts and Data (ZIP)", data=zip_bytes, file_name="reports.zip", mime="application/zip")
     else:
         st.info("No emissions data to download.")
 
@@ -641,4 +572,19 @@ elif menu == "Offset Contribution":
     💚 **Total Estimated Offset:** **{total_offset:.2f} kg CO₂/year**
      """)
 
-    
+elif menu == "Admin":
+    st.header("Admin")
+    st.subheader("Per-session emission buffer memory")
+    sessions = live_buffers()
+    df_mem = pd.DataFrame([{
+        "Session": session_id[:8],
+        "User": buf.owner,
+        "Rows": len(buf),
+        "Capacity": buf.capacity,
+        "Memory (KB)": buf.nbytes / 1024
+    } for session_id, buf in sessions])
+    if not df_mem.empty:
+        st.dataframe(df_mem)
+        st.write(f"**{len(sessions)} sessions, {df_mem['Memory (KB)'].sum():.1f} KB in total**")
+    else:
+        st.info("No active sessions.")
@@ -0,0 +1,178 @@
+# batch_reports.py
+# Build every user's "Download" page report (CSV, chart PNGs, ZIP) for a period.
+#
+#   python batch_reports.py                       # last month, one report per user
+#   python batch_reports.py --period 2025         # a whole year
+#   python batch_reports.py --period 2025-03 --by-facility --workers 8
+#
+# For month-end runs, schedule it e.g. with cron: 0 2 1 * * cd /app && python batch_reports.py
+#
+# Output goes to reports/<period>/<user>[/<facility>]/ plus a manifest.json
+# describing every report, including users with no data and any failures.
+import argparse
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+
+from database import init_db, Session, User, Emission
+from reports import emissions_frame, report_csv, report_images, report_zip
+
+
+def parse_period(value):
+    """'2025' or '2025-03' -> (label, first day, first day after)."""
+    if re.fullmatch(r"\d{4}", value):
+        year = int(value)
+        return value, date(year, 1, 1), date(year + 1, 1, 1)
+    match = re.fullmatch(r"(\d{4})-(\d{1,2})", value)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise argparse.ArgumentTypeError("period must be YYYY or YYYY-MM")
+    year, month = int(match.group(1)), int(match.group(2))
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return f"{year}-{month:02d}", start, end
+
+
+def last_month():
+    today = date.today()
+    if today.month == 1:
+        return f"{today.year - 1}-12"
+    return f"{today.year}-{today.month - 1:02d}"
+
+
+def safe_name(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_") or "unnamed"
+
+
+def warm_renderer():
+    """Pool initializer: start Kaleido's renderer once so every report in this worker reuses it.
+
+    A failure here must not break the pool; the reports then record the render error themselves.
+    """
+    try:
+        import plotly.graph_objects as go
+        import plotly.io as pio
+        pio.to_image(go.Figure(), format="png")
+    except Exception as exc:
+        print(f"warning: could not start Kaleido renderer: {exc!r}")
+
+
+def job_entry(job):
+    return {"user_id": job["user_id"], "user": job["user"], "facility": job["facility"],
+            "directory": job["directory"], "rows": len(job["records"]), "files": []}
+
+
+def build_report(job):
+    """Write one report's files and return its manifest entry. Runs in a worker process."""
+    started = time.perf_counter()
+    entry = job_entry(job)
+    try:
+        df_all = emissions_frame(job["records"])
+        if df_all.empty:
+            entry["status"] = "no data"
+            return entry
+        os.makedirs(job["directory"], exist_ok=True)
+        csv = report_csv(df_all)
+        images = report_images(df_all)
+        files = {"emissions.csv": csv, **images, "reports.zip": report_zip(csv, images)}
+        for name, content in files.items():
+            with open(os.path.join(job["directory"], name), "wb") as f:
+                f.write(content)
+        entry["files"] = list(files)
+        entry["total_emission"] = float(df_all["Emission"].sum())
+        entry["status"] = "ok"
+    except Exception as exc:
+        entry["status"] = "error"
+        entry["error"] = repr(exc)
+    finally:
+        entry["seconds"] = round(time.perf_counter() - started, 3)
+    return entry
+
+
+def plan_jobs(out_dir, start, end, by_facility):
+    """One grouped read of the period's emissions, split into per-user (or per-facility) jobs."""
+    session = Session()
+    try:
+        users = session.query(User.id, User.name).order_by(User.id).all()
+        rows = (session.query(Emission.user_id, Emission.date, Emission.facility,
+                              Emission.category, Emission.value)
+                .filter(Emission.date >= start, Emission.date < end)
+                .all())
+    finally:
+        session.close()
+
+    by_user = defaultdict(list)
+    for row in rows:
+        by_user[row.user_id].append(row)
+
+    jobs = []
+    for user_id, name in users:
+        user_dir = os.path.join(out_dir, f"{user_id}_{safe_name(name)}")
+        records = by_user.get(user_id, [])
+        if not by_facility or not records:
+            jobs.append({"user_id": user_id, "user": name, "facility": None,
+                         "directory": user_dir, "records": records})
+            continue
+        by_fac = defaultdict(list)
+        for rec in records:
+            by_fac[rec.facility].append(rec)
+        for facility, fac_records in sorted(by_fac.items()):
+            jobs.append({"user_id": user_id, "user": name, "facility": facility,
+                         "directory": os.path.join(user_dir, safe_name(facility)), "records": fac_records})
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Download-page reports for every user")
+    parser.add_argument("--period", type=parse_period, default=last_month(), help="YYYY or YYYY-MM (default: last month)")
+    parser.add_argument("--out", default="reports", help="output root directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--by-facility", action="store_true", help="one report per user and facility")
+    args = parser.parse_args()
+    label, start, end = args.period
+
+    init_db()
+    out_dir = os.path.join(args.out, label)
+    jobs = plan_jobs(out_dir, start, end, args.by_facility)
+    print(f"Building {len(jobs)} report(s) for {label} with {args.workers} worker(s) ...")
+
+    started = time.perf_counter()
+    entries = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=warm_renderer) as pool:
+        futures = {pool.submit(build_report, job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                entry = future.result()
+            except Exception as exc:
+                # e.g. BrokenProcessPool: record the job as failed and keep going
+                entry = job_entry(futures[future])
+                entry.update(status="error", error=repr(exc), seconds=0.0)
+            entries.append(entry)
+            where = entry["user"] + (f" / {entry['facility']}" if entry["facility"] else "")
+            print(f"  [{entry['status']}] {where} ({entry['seconds']:.1f}s)")
+    elapsed = time.perf_counter() - started
+
+    entries.sort(key=lambda e: (e["user_id"], e["facility"] or ""))
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {
+        "period": label,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round(elapsed, 1),
+        "reports": entries,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    errors = sum(e["status"] == "error" for e in entries)
+    print(f"Done in {elapsed:.1f}s: {len(entries) - errors} ok or empty, {errors} failed. "
+          f"Manifest: {os.path.join(out_dir, 'manifest.json')}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,13 +1,24 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, Date
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, ForeignKey, Date, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.exc import IntegrityError
 import bcrypt
+from bisect import bisect_right
+from datetime import date
+from factors import FACTOR_TABLE
 
 engine = create_engine("sqlite:///carbon.db", echo=False)
 Session = sessionmaker(bind=engine)
 Base = declarative_base()
 
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    # WAL lets the app keep reading while the ingestion service writes
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
@@ -25,11 +36,102 @@ class Emission(Base):
     facility = Column(String, nullable=False)
     category = Column(String, nullable=False)
     value = Column(Float, nullable=False)
+    # Activity data behind `value`, kept so it can be recomputed when factors change.
+    # NULL for rows logged before these columns existed.
+    subtype = Column(String)
+    unit = Column(String)
+    amount = Column(Float)
 
     user = relationship("User", back_populates="emissions")
 
+class EmissionFactor(Base):
+    """kg CO₂e per unit for one (category, subtype, unit), effective from `valid_from`."""
+    __tablename__ = "emission_factors"
+    __table_args__ = (UniqueConstraint("category", "subtype", "unit", "valid_from"),)
+    id = Column(Integer, primary_key=True)
+    category = Column(String, nullable=False)
+    subtype = Column(String, nullable=False)
+    unit = Column(String, nullable=False)
+    factor = Column(Float, nullable=False)
+    valid_from = Column(Date, nullable=False)
+
+# Date of the first factor version, seeded from factors.py
+FACTORS_EPOCH = date(1900, 1, 1)
+ACTIVITY_COLUMNS = {"subtype": "VARCHAR", "unit": "VARCHAR", "amount": "FLOAT"}
+
+_initialized = False
+
 def init_db():
+    """Create tables, add activity columns to old databases and seed factors. Runs once per process."""
+    global _initialized
+    if _initialized:
+        return
     Base.metadata.create_all(engine)
+    existing = {col["name"] for col in inspect(engine).get_columns("emissions")}
+    with engine.begin() as conn:
+        for name, sql_type in ACTIVITY_COLUMNS.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE emissions ADD COLUMN {name} {sql_type}"))
+    session = Session()
+    try:
+        if session.query(EmissionFactor).first() is None:
+            publish_factors(session, FACTORS_EPOCH)
+    finally:
+        session.close()
+    _initialized = True
+
+def current_factors(session, as_of):
+    """Return {(category, subtype, unit): factor} effective on `as_of`."""
+    factors = {}
+    rows = (session.query(EmissionFactor)
+            .filter(EmissionFactor.valid_from <= as_of)
+            .order_by(EmissionFactor.valid_from))
+    for row in rows:
+        factors[(row.category, row.subtype, row.unit)] = row.factor
+    return factors
+
+def factor_history(session):
+    """Return {(category, subtype, unit): [(valid_from, factor), ...]} oldest first."""
+    history = {}
+    rows = session.query(EmissionFactor).order_by(EmissionFactor.valid_from)
+    for row in rows:
+        history.setdefault((row.category, row.subtype, row.unit), []).append((row.valid_from, row.factor))
+    return history
+
+def effective_factor(history, key, as_of):
+    """Factor from `history` in effect on `as_of`; falls back to factors.py for unpublished keys."""
+    versions = history.get(key)
+    if not versions:
+        return FACTOR_TABLE.get(key)
+    i = bisect_right([valid_from for valid_from, _ in versions], as_of)
+    return versions[i - 1][1] if i else FACTOR_TABLE.get(key)
+
+def factor_on(session, key, as_of):
+    """Factor for one (category, subtype, unit) in effect on `as_of`; falls back to factors.py."""
+    category, subtype, unit = key
+    factor = (session.query(EmissionFactor.factor)
+              .filter_by(category=category, subtype=subtype, unit=unit)
+              .filter(EmissionFactor.valid_from <= as_of)
+              .order_by(EmissionFactor.valid_from.desc())
+              .limit(1)
+              .scalar())
+    return FACTOR_TABLE.get(key) if factor is None else factor
+
+def publish_factors(session, valid_from, table=None):
+    """Record a new factor version for every entry of `table` (default: factors.py) that
+    differs from what is effective on `valid_from`. Returns the keys that changed."""
+    table = FACTOR_TABLE if table is None else table
+    effective = current_factors(session, valid_from)
+    changed = [key for key, factor in table.items() if effective.get(key) != factor]
+    for category, subtype, unit in changed:
+        row = session.query(EmissionFactor).filter_by(
+            category=category, subtype=subtype, unit=unit, valid_from=valid_from).first()
+        if row is None:
+            row = EmissionFactor(category=category, subtype=subtype, unit=unit, valid_from=valid_from)
+            session.add(row)
+        row.factor = table[(category, subtype, unit)]
+    session.commit()
+    return changed
 
 def create_user(name, email, password):
     """Create a new user with hashed password."""
@@ -0,0 +1,90 @@
+# emission_buffer.py
+# Compact, bounded per-session log of submitted emissions.
+import weakref
+
+import numpy as np
+
+from factors import FACILITIES, CATEGORIES, MONTHS
+
+DEFAULT_CAPACITY = 1024
+INITIAL_ROWS = 16
+
+# 13 bytes per entry; facility/category/month are stored as codes into the factors.py lists
+ROW_DTYPE = np.dtype([
+    ("year", np.int16),
+    ("month", np.uint8),      # 1-12
+    ("facility", np.uint8),   # index into FACILITIES
+    ("category", np.uint8),   # index into CATEGORIES
+    ("emission", np.float64),
+])
+
+FACILITY_CODES = {name: i for i, name in enumerate(FACILITIES)}
+CATEGORY_CODES = {name: i for i, name in enumerate(CATEGORIES)}
+
+# session id -> buffer, for the admin memory report; entries vanish with their session
+_live_buffers = weakref.WeakValueDictionary()
+
+
+class EmissionBuffer:
+    """Columnar replacement for the old list-of-dicts `emission_log`.
+
+    Rows live in one NumPy structured array that grows by doubling up to
+    `capacity`. Callers append only after the row is committed to the
+    database, so when full the oldest quarter can simply be evicted.
+    """
+
+    __slots__ = ("capacity", "owner", "_rows", "_size", "__weakref__")
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, owner=""):
+        self.capacity = capacity
+        self.owner = owner
+        self._rows = np.zeros(min(INITIAL_ROWS, capacity), dtype=ROW_DTYPE)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return self._rows.nbytes
+
+    def append(self, year, month, facility, category, emission):
+        if self._size == len(self._rows):
+            if self._size < self.capacity:
+                self._rows = np.resize(self._rows, min(self._size * 2, self.capacity))
+            else:
+                self._evict()
+        self._rows[self._size] = (
+            int(year),
+            MONTHS.index(month) + 1,
+            FACILITY_CODES[facility],
+            CATEGORY_CODES[category],
+            emission,
+        )
+        self._size += 1
+
+    def _evict(self):
+        drop = max(1, self.capacity // 4)
+        self._rows[:self._size - drop] = self._rows[drop:self._size]
+        self._size -= drop
+
+    def totals(self, year, month, facility):
+        """Sum of |emission| per category for one facility and month."""
+        rows = self._rows[:self._size]
+        mask = (
+            (rows["year"] == int(year)) &
+            (rows["month"] == MONTHS.index(month) + 1) &
+            (rows["facility"] == FACILITY_CODES[facility])
+        )
+        sums = np.bincount(rows["category"][mask], weights=np.abs(rows["emission"][mask]),
+                           minlength=len(CATEGORIES))
+        return {category: float(sums[i]) for i, category in enumerate(CATEGORIES)}
+
+
+def register_buffer(session_id, buffer):
+    _live_buffers[session_id] = buffer
+
+
+def live_buffers():
+    """Return [(session_id, buffer)] for sessions that are still alive."""
+    return list(_live_buffers.items())
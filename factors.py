@@ -0,0 +1,124 @@
+# factors.py
+# Emission factor tables shared by the Streamlit app and the ingestion service.
+
+FACILITIES = [
+    "Residential Areas",
+    "Hostels",
+    "Academic Area",
+    "Health Centre",
+    "Schools",
+    "Visitor's Hostel",
+    "Servants Quarters",
+    "Shops/Bank/PO"
+]
+MONTHS = [
+    "January","February","March","April","May","June",
+    "July","August","September","October","November","December"
+]
+
+# Emission factor dictionaries
+emission_factors = {
+    "Fossil Fuels": {"CNG": 2.21},
+    "Fossil Fuels per litre": {"Petrol/Gasoline": 2.315, "Diesel": 2.68, "LPG": 1.51},
+    "Fossil Fuels per scm": {"PNG": 2.1},
+    "Electricity": {"Coal/Thermal": 0.85, "Solar": 0.00}
+}
+f_e_f = {
+    "Domestic Refrigeration": 1430,
+    "Commercial Refrigeration": 3922,
+    "Industrial Refrigeration": 2088,
+    "Residential and Commercial A/C": 1650
+}
+of_e_f = {
+    "tree": 1.75,
+    "soil": 0.0515,
+    "grass": 0.0309,
+    "water": 0.0412
+}
+e_e_f = {
+    "Coal/Thermal": 0.92,
+    "Solar": 0.05
+}
+w_e_f = 0.344
+wa_e_f = {
+    "Household Residue": {"Landfills": 1.0, "Combustion": 0.7, "Recycling": 0.2, "Composting": 0.1},
+    "Food and Drink Waste": {"Landfills": 1.9, "Combustion": 0.8, "Recycling": 0.3, "Composting": 0.05},
+    "Garden Waste": {"Landfills": 0.6, "Combustion": 0.4, "Recycling": 0.2, "Composting": 0.03},
+    "Commercial and Industrial Waste": {"Landfills": 2.0, "Combustion": 1.5, "Recycling": 0.6, "Composting": 0.2}
+}
+WATER_TYPES = ["Supplied Water", "Treated water"]
+
+# Travel factors (kg CO₂ per km)
+flight_emissions = {"Short Haul": 0.15, "Long Haul": 0.11, "Domestic": 0.18, "International": 0.13}
+metro_emission_factor = 0.04
+train_emission_factors = {"Electric": 0.035, "Diesel": 0.06, "Hydrogen": 0.04}
+personal_emission_factors = {"Small Sized Car": 0.12, "Medium Sized Car": 0.17, "Large Sized Car": 0.22, "Motorcycle": 0.09}
+bus_emission_factors = {"Electricity": 0.03, "Diesel": 0.09, "Hydrogen": 0.05}
+taxi_emission_factors = {"Electricity": 0.06, "Petrol": 0.16, "Hydrogen": 0.07, "CNG": 0.13}
+
+SAFE_LIMITS = {
+    "Fossil Fuels": 5000,
+    "Fugitive": 3000,
+    "Electricity": 4000,
+    "Water": 2000,
+    "Waste": 1500,
+    "Travel": 3500
+}
+CATEGORIES = list(SAFE_LIMITS)
+
+
+def join_subtype(*parts):
+    """Join nested choices into one subtype key, e.g. join_subtype("Bus", "Diesel")."""
+    return " / ".join(parts)
+
+
+def build_factor_table():
+    """Flatten the dictionaries above into {(category, subtype, unit): kg CO₂e per unit}.
+
+    Unit conversions (Tonne -> kg, million litres -> m³) are folded into the
+    factor, so every emission is simply ``amount * factor``.
+    """
+    table = {}
+    for fuel, factor in emission_factors["Fossil Fuels"].items():
+        table[("Fossil Fuels", fuel, "Kg")] = factor
+        table[("Fossil Fuels", fuel, "Tonne")] = factor * 1000
+    for fuel, factor in emission_factors["Fossil Fuels per litre"].items():
+        table[("Fossil Fuels", fuel, "litre")] = factor
+    for fuel, factor in emission_factors["Fossil Fuels per scm"].items():
+        table[("Fossil Fuels", fuel, "SCM")] = factor
+    for application, gwp in f_e_f.items():
+        table[("Fugitive", application, "Kg")] = gwp
+        table[("Fugitive", application, "Tonne")] = gwp * 1000
+    for source, factor in e_e_f.items():
+        table[("Electricity", source, "KWH")] = factor
+    for water_type in WATER_TYPES:
+        table[("Water", water_type, "Cubic metre")] = w_e_f
+        table[("Water", water_type, "million litres")] = w_e_f * 1000
+    for waste_type, treatments in wa_e_f.items():
+        for treatment, factor in treatments.items():
+            subtype = join_subtype(waste_type, treatment)
+            table[("Waste", subtype, "Kg")] = factor
+            table[("Waste", subtype, "Tonne")] = factor * 1000
+    for length, factor in flight_emissions.items():
+        table[("Travel", join_subtype("Airways", length), "km")] = factor
+    table[("Travel", join_subtype("Railways", "Metro"), "km")] = metro_emission_factor
+    for train, factor in train_emission_factors.items():
+        table[("Travel", join_subtype("Railways", train), "km")] = factor
+    for vehicle, factor in personal_emission_factors.items():
+        table[("Travel", join_subtype("Personal", vehicle), "km")] = factor
+    for fuel, factor in bus_emission_factors.items():
+        table[("Travel", join_subtype("Bus", fuel), "km")] = factor
+    for fuel, factor in taxi_emission_factors.items():
+        table[("Travel", join_subtype("Taxi", fuel), "km")] = factor
+    return table
+
+
+FACTOR_TABLE = build_factor_table()
+
+
+def compute_emission(category, subtype, unit, amount):
+    """Return kg CO₂e for an activity, or None if the combination has no factor."""
+    factor = FACTOR_TABLE.get((category, subtype, unit))
+    if factor is None:
+        return None
+    return amount * factor
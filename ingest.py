@@ -0,0 +1,357 @@
+# ingest.py
+# Standalone HTTP service for automated meter readings.
+#
+#   python ingest.py serve --port 8600
+#   python ingest.py loadgen --email you@gmail.com --password secret --readings 20000
+#
+# POST /readings with HTTP Basic auth (the same email/password as the app) and a
+# JSON body that is either a list of readings or {"readings": [...]}:
+#
+#   {"facility": "Hostels", "category": "Electricity", "subtype": "Coal/Thermal",
+#    "unit": "KWH", "amount": 412.5, "timestamp": "2025-04-30T23:59:00Z"}
+#
+# Readings are validated against factors.py and queued; a single writer prices
+# them with the factor in effect on each reading's date and bulk-inserts them
+# into `emissions`, so the response is 202 Accepted.
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+from tornado import httpclient, web
+
+from database import init_db, Session, User, Emission, authenticate, factor_history, effective_factor
+from factors import FACILITIES, CATEGORIES, compute_emission
+
+MAX_BATCH = 5000        # readings per request
+FLUSH_ROWS = 5000       # rows per INSERT
+FLUSH_INTERVAL = 0.25   # seconds to wait for more rows before inserting
+QUEUE_BATCHES = 1000    # pending requests before clients are slowed down
+
+log = logging.getLogger("ingest")
+
+
+def parse_timestamp(value):
+    """Accept ISO 8601 strings or Unix epoch seconds."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"timestamp out of range: {value}") from None
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    raise ValueError("timestamp must be an ISO 8601 string or epoch seconds")
+
+
+def parse_reading(reading):
+    """Validate one reading and return the matching `emissions` row. Raises ValueError."""
+    if not isinstance(reading, dict):
+        raise ValueError("reading must be an object")
+    missing = [k for k in ("facility", "category", "unit", "amount", "timestamp") if k not in reading]
+    if missing:
+        raise ValueError(f"missing field(s): {', '.join(missing)}")
+    facility = reading["facility"]
+    category = reading["category"]
+    if facility not in FACILITIES:
+        raise ValueError(f"unknown facility: {facility}")
+    if category not in CATEGORIES:
+        raise ValueError(f"unknown category: {category}")
+    subtype = reading.get("subtype")
+    unit = reading["unit"]
+    if not isinstance(unit, str) or not (subtype is None or isinstance(subtype, str)):
+        raise ValueError("unit and subtype must be strings")
+    amount = reading["amount"]
+    if (isinstance(amount, bool) or not isinstance(amount, (int, float))
+            or not math.isfinite(amount) or amount < 0):
+        raise ValueError("amount must be a finite, non-negative number")
+    value = compute_emission(category, subtype, unit, amount)
+    if value is None:
+        raise ValueError(f"no emission factor for {category} / {subtype} / {unit}")
+    return {
+        "date": parse_timestamp(reading["timestamp"]).date(),
+        "facility": facility,
+        "category": category,
+        "value": value,
+        "subtype": subtype,
+        "unit": unit,
+        "amount": amount,
+    }
+
+
+class EmissionWriter:
+    """Collects converted readings and bulk-inserts them from one background task.
+
+    A single writer keeps SQLite to one write transaction at a time, and a
+    bounded queue pushes back on clients when inserts fall behind.
+    """
+
+    def __init__(self, session_factory=Session, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.session_factory = session_factory
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.inserted = 0
+        self.failed = 0          # rows dropped because their INSERT failed
+        self._queue = asyncio.Queue(maxsize=QUEUE_BATCHES)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def submit(self, rows):
+        await self._queue.put(rows)
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            rows = list(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(rows) < self.flush_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.extend(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await loop.run_in_executor(None, self._insert, rows)
+            except Exception:
+                # Keep the writer alive; one bad batch must not stop ingestion
+                self.failed += len(rows)
+                log.exception("failed to insert %d readings", len(rows))
+
+    def _insert(self, rows):
+        session = self.session_factory()
+        try:
+            # Price each row with the factor in effect on its date, not today's factors.py
+            history = factor_history(session)
+            for row in rows:
+                factor = effective_factor(history, (row["category"], row["subtype"], row["unit"]), row["date"])
+                if factor is not None:
+                    row["value"] = row["amount"] * factor
+            session.execute(insert(Emission), rows)
+            session.commit()
+            self.inserted += len(rows)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    async def close(self):
+        """Stop the background task and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        rows = []
+        while not self._queue.empty():
+            rows.extend(self._queue.get_nowait())
+        if rows:
+            await asyncio.get_running_loop().run_in_executor(None, self._insert, rows)
+
+
+class CredentialCache:
+    """Remembers verified credentials so bcrypt runs once per meter, not per request.
+
+    Each hit is checked against the user's current password hash, so deleted
+    users and changed passwords stop working straight away.
+    """
+
+    def __init__(self, session_factory=Session):
+        self.session_factory = session_factory
+        self._users = {}  # sha256(email, password) -> (user id, stored bcrypt hash)
+
+    def _stored_hash(self, user_id, email):
+        session = self.session_factory()
+        try:
+            return session.query(User.password).filter_by(id=user_id, email=email).scalar()
+        finally:
+            session.close()
+
+    async def user_id(self, email, password):
+        key = hashlib.sha256(f"{email}\0{password}".encode("utf-8")).hexdigest()
+        loop = asyncio.get_running_loop()
+        cached = self._users.get(key)
+        if cached is not None:
+            user_id, stored = cached
+            if await loop.run_in_executor(None, self._stored_hash, user_id, email) == stored:
+                return user_id
+            del self._users[key]
+        user = await loop.run_in_executor(None, authenticate, email, password)
+        if user is None:
+            return None
+        self._users[key] = (user.id, user.password)
+        return user.id
+
+
+class ReadingsHandler(web.RequestHandler):
+    def initialize(self, writer, credentials):
+        self.writer = writer
+        self.credentials = credentials
+
+    async def _current_user_id(self):
+        header = self.request.headers.get("Authorization", "")
+        if not header.startswith("Basic "):
+            return None
+        try:
+            email, password = base64.b64decode(header[6:]).decode("utf-8").split(":", 1)
+        except ValueError:
+            return None
+        return await self.credentials.user_id(email, password)
+
+    async def post(self):
+        user_id = await self._current_user_id()
+        if user_id is None:
+            self.set_header("WWW-Authenticate", 'Basic realm="carbonf"')
+            self.set_status(401)
+            self.finish({"error": "invalid email or password"})
+            return
+
+        try:
+            payload = json.loads(self.request.body)
+        except ValueError:
+            self.set_status(400)
+            self.finish({"error": "body must be JSON"})
+            return
+        readings = payload.get("readings") if isinstance(payload, dict) else payload
+        if not isinstance(readings, list):
+            self.set_status(400)
+            self.finish({"error": "expected a list of readings"})
+            return
+        if len(readings) > MAX_BATCH:
+            self.set_status(413)
+            self.finish({"error": f"at most {MAX_BATCH} readings per request"})
+            return
+
+        rows, errors = [], []
+        for index, reading in enumerate(readings):
+            try:
+                row = parse_reading(reading)
+            except ValueError as exc:
+                errors.append({"index": index, "error": str(exc)})
+                continue
+            row["user_id"] = user_id
+            rows.append(row)
+        if rows:
+            await self.writer.submit(rows)
+
+        self.set_status(202 if rows else 400)
+        self.finish({"accepted": len(rows), "rejected": len(errors), "errors": errors})
+
+
+class HealthHandler(web.RequestHandler):
+    def initialize(self, writer):
+        self.writer = writer
+
+    def get(self):
+        self.finish({"pending_batches": self.writer.pending, "inserted": self.writer.inserted,
+                     "failed": self.writer.failed})
+
+
+def make_app(writer, credentials=None):
+    """Build the Tornado application; the caller owns starting and closing `writer`."""
+    credentials = credentials or CredentialCache()
+    return web.Application([
+        (r"/readings", ReadingsHandler, {"writer": writer, "credentials": credentials}),
+        (r"/health", HealthHandler, {"writer": writer}),
+    ])
+
+
+async def serve(port):
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    writer = EmissionWriter()
+    writer.start()
+    server = make_app(writer).listen(port)
+    print(f"Ingestion service listening on http://localhost:{port}/readings")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.stop()
+        await writer.close()
+
+
+def random_reading():
+    """A plausible smart-meter reading for load generation."""
+    if random.random() < 0.5:
+        reading = {"category": "Electricity", "subtype": "Coal/Thermal", "unit": "KWH",
+                   "amount": round(random.uniform(10, 500), 2)}
+    else:
+        reading = {"category": "Water", "subtype": "Supplied Water", "unit": "Cubic metre",
+                   "amount": round(random.uniform(1, 50), 2)}
+    reading["facility"] = random.choice(FACILITIES)
+    reading["timestamp"] = datetime.now(timezone.utc).isoformat()
+    return reading
+
+
+async def loadgen(url, email, password, total, batch_size, concurrency):
+    """Post `total` readings in batches and report throughput."""
+    client = httpclient.AsyncHTTPClient(max_clients=concurrency)
+    token = base64.b64encode(f"{email}:{password}".encode("utf-8")).decode("ascii")
+    headers = {"Authorization": f"Basic {token}", "Content-Type": "application/json"}
+    batches = [json.dumps([random_reading() for _ in range(min(batch_size, total - start))])
+               for start in range(0, total, batch_size)]
+    latencies = []
+    accepted = 0
+
+    async def worker():
+        nonlocal accepted
+        while batches:
+            body = batches.pop()
+            t0 = time.perf_counter()
+            response = await client.fetch(url, method="POST", headers=headers, body=body, raise_error=False)
+            latencies.append(time.perf_counter() - t0)
+            if response.code == 202:
+                accepted += json.loads(response.body)["accepted"]
+            else:
+                print(f"HTTP {response.code}: {response.body[:200]!r}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{accepted}/{total} readings accepted in {elapsed:.2f}s "
+          f"({accepted / elapsed:.0f} readings/s)")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"request latency p50={p50 * 1000:.1f}ms p95={p95 * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart-meter ingestion service")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="run the ingestion service")
+    p_serve.add_argument("--port", type=int, default=8600)
+    p_load = sub.add_parser("loadgen", help="load-test a running service")
+    p_load.add_argument("--url", default="http://localhost:8600/readings")
+    p_load.add_argument("--email", required=True)
+    p_load.add_argument("--password", required=True)
+    p_load.add_argument("--readings", type=int, default=20000)
+    p_load.add_argument("--batch-size", type=int, default=500)
+    p_load.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(args.port))
+    else:
+        asyncio.run(loadgen(args.url, args.email, args.password,
+                            args.readings, args.batch_size, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# loadtest.py
+# Concurrent-session load test for app.py using Streamlit's AppTest.
+#
+#   python loadtest.py --users 20 --iterations 3
+#   python loadtest.py --users 50 --pages "Carbon Data,Carbon Metre"
+#
+# Every simulated user runs its own AppTest session in a separate process (AppTest
+# keeps a process-wide runtime, so sessions cannot share one), all against a
+# seeded database in a scratch directory; carbon.db in the repo is never touched.
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(REPO_DIR, "app.py")
+PASSWORD = "loadtest"
+PAGES = [
+    "Carbon Data",
+    "Carbon Metre",
+    "Emission Analysis",
+    "Year and Facility Analysis",
+    "Download",
+    "Offset Contribution"
+]
+
+
+def watch_sqlite(engine, result):
+    """Time every INSERT/UPDATE/DELETE, which is where SQLite lock waits show up."""
+    from sqlalchemy import event
+
+    started = {}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        started[id(cursor)] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        t0 = started.pop(id(cursor), None)
+        if t0 is not None and statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            result["write_waits"].append(time.perf_counter() - t0)
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(context):
+        if "database is locked" in str(context.original_exception):
+            result["lock_errors"] += 1
+
+
+def seed(users, rows_per_user):
+    """Create load-test users and a year of emissions each. Returns their emails."""
+    from database import init_db, create_user, Session, User, Emission
+    from factors import FACILITIES, CATEGORIES
+
+    init_db()
+    emails = []
+    for i in range(users):
+        email = f"loaduser{i}@gmail.com"
+        create_user(f"loaduser{i}", email, PASSWORD)
+        emails.append(email)
+
+    # create_user returns None for accounts left over in a reused --workdir, so look ids up
+    session = Session()
+    user_ids = [user_id for (user_id,) in session.query(User.id).filter(User.email.in_(emails))]
+    today = date.today()
+    rows = []
+    for user_id in user_ids:
+        for _ in range(rows_per_user):
+            rows.append(Emission(
+                user_id=user_id,
+                date=date(today.year, random.randint(1, 12), 1),
+                facility=random.choice(FACILITIES),
+                category=random.choice(CATEGORIES),
+                value=random.uniform(10, 2000),
+            ))
+    session.bulk_save_objects(rows)
+    session.commit()
+    session.close()
+    return emails
+
+
+def timed_run(at, result, step):
+    t0 = time.perf_counter()
+    at.run()
+    result["latencies"][step].append(time.perf_counter() - t0)
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].message}")
+
+
+def new_result(failure=None):
+    return {"latencies": defaultdict(list), "write_waits": [], "lock_errors": 0,
+            "failure": failure, "warmup_rss_kb": 0, "rss_kb": None, "buffer_bytes": 0}
+
+
+def submit_forms(at, result, facilities, months):
+    """Fill and submit the Electricity, Water and Travel forms on the Carbon Data page."""
+    def form(label):
+        return next(e for e in at.expander if e.label == label)
+
+    next(s for s in at.selectbox if s.label == "Facility").set_value(random.choice(facilities))
+    next(s for s in at.selectbox if s.label == "Month").set_value(random.choice(months))
+
+    electricity = form("Electricity")
+    next(s for s in electricity.selectbox if s.label == "Electricity Type").set_value("Coal/Thermal")
+    electricity.number_input[0].set_value(random.uniform(50, 500))
+    electricity.button[0].click()
+    timed_run(at, result, "submit electricity")
+
+    water = form("Water")
+    next(s for s in water.selectbox if s.label == "Water Type").set_value("Supplied Water")
+    next(s for s in water.selectbox if s.label == "Unit").set_value("Cubic metre")
+    water.number_input[0].set_value(random.uniform(10, 200))
+    water.button[0].click()
+    timed_run(at, result, "submit water")
+
+    # Travel shows its distance input only once a mode is chosen
+    next(s for s in form("Travel").selectbox if s.label == "Mode of Transport").set_value("Railways")
+    timed_run(at, result, "travel mode")
+    travel = form("Travel")
+    travel.number_input[0].set_value(random.uniform(5, 100))
+    travel.button[0].click()
+    timed_run(at, result, "submit travel")
+
+
+def view_carbon_metre(at, result, facilities, months):
+    """Load the Campus Overview heatmap, then drill down into one facility's gauges."""
+    at.radio(key="metre_view").set_value("Campus Overview")
+    at.selectbox(key="metre_month").set_value(random.choice(months))
+    timed_run(at, result, "metre overview")
+    at.selectbox(key="metre_drill_facility").set_value(random.choice(facilities))
+    next(b for b in at.button if b.label == "Show gauges").click()
+    timed_run(at, result, "metre gauges")
+
+
+def simulate_user(workdir, email, pages, iterations, timeout, barrier, startup_timeout):
+    """One user's session: log in through auth.login, walk the sidebar pages, submit forms.
+
+    The first pass over the pages is the warm-up: it pays for imports and
+    first-render caches, so memory growth is measured from the end of it.
+    Runs in its own process and returns plain data for the parent to merge.
+    """
+    result = new_result()
+    try:
+        os.chdir(workdir)
+        sys.path.insert(0, REPO_DIR)
+        from streamlit.testing.v1 import AppTest
+        import database
+        from factors import FACILITIES, MONTHS
+
+        watch_sqlite(database.engine, result)
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    except Exception as exc:
+        barrier.abort()  # release everyone else instead of leaving them waiting
+        result["failure"] = f"{email}: startup failed: {exc!r}"
+        result["latencies"] = {}
+        return result
+    try:
+        barrier.wait(startup_timeout)  # start every session at the same moment
+    except threading.BrokenBarrierError:
+        result["failure"] = f"{email}: another session failed to start"
+        result["latencies"] = {}
+        return result
+    rss_start = rss_warm = peak_rss_kb()
+    try:
+        timed_run(at, result, "login page")
+        at.text_input(key="login_email").set_value(email)
+        at.text_input(key="login_password").set_value(PASSWORD)
+        next(b for b in at.button if b.label == "Login").click()
+        timed_run(at, result, "login")
+        timed_run(at, result, "welcome")  # the app stops after login(); the next rerun shows the greeting
+        next(b for b in at.button if b.label.startswith("Let")).click()
+        timed_run(at, result, "get started")
+
+        for iteration in range(iterations):
+            if iteration == 1:
+                rss_warm = peak_rss_kb()
+            for page in pages:
+                at.sidebar.radio[0].set_value(page)
+                timed_run(at, result, page)
+                if page == "Carbon Data":
+                    submit_forms(at, result, FACILITIES, MONTHS)
+                elif page == "Carbon Metre":
+                    view_carbon_metre(at, result, FACILITIES, MONTHS)
+    except Exception as exc:
+        result["failure"] = f"{email}: {exc!r}"
+    result["warmup_rss_kb"] = rss_warm - rss_start
+    if iterations > 1:
+        result["rss_kb"] = peak_rss_kb() - rss_warm
+    if "emission_log" in at.session_state:
+        result["buffer_bytes"] = at.session_state["emission_log"].nbytes
+    result["latencies"] = dict(result["latencies"])
+    return result
+
+
+def peak_rss_kb():
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else rss
+
+
+def percentiles(values):
+    p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+    return f"n={len(values):5d}  p50={p50:8.1f}ms  p95={p95:8.1f}ms  p99={p99:8.1f}ms"
+
+
+def report(results, elapsed):
+    latencies = defaultdict(list)
+    for result in results:
+        for step, values in result["latencies"].items():
+            latencies[step].extend(values)
+    write_waits = [w for result in results for w in result["write_waits"]]
+    failures = [result["failure"] for result in results if result["failure"]]
+
+    print(f"\n{len(results)} concurrent sessions in {elapsed:.1f}s")
+    print("\nRerun latency")
+    for step, values in latencies.items():
+        print(f"  {step:28s} {percentiles(values)}")
+    all_runs = [v for values in latencies.values() for v in values]
+    if all_runs:
+        print(f"  {'all reruns':28s} {percentiles(all_runs)}")
+        print(f"  throughput: {len(all_runs) / elapsed:.1f} reruns/s")
+
+    print("\nSQLite writes (statement time, includes lock waits)")
+    if write_waits:
+        print(f"  {'writes':28s} {percentiles(write_waits)}")
+    print(f"  'database is locked' errors: {sum(result['lock_errors'] for result in results)}")
+
+    # Each session is its own process, so the warm-up pass pays for Streamlit, pandas and
+    # plotly imports once; only growth after it approximates the cost of one more session.
+    print("\nMemory per session")
+    warmup = [r["warmup_rss_kb"] for r in results]
+    print(f"  warm-up pass (imports, first render): {np.mean(warmup) / 1024:.1f} MB "
+          f"(max {max(warmup) / 1024:.1f} MB), a one-off per server process")
+    growth = [r["rss_kb"] for r in results if r["rss_kb"] is not None]
+    if growth:
+        print(f"  peak RSS growth after warm-up: {np.mean(growth) / 1024:.1f} MB (max {max(growth) / 1024:.1f} MB)")
+    else:
+        print("  peak RSS growth after warm-up: not measured, needs --iterations 2 or more")
+    print(f"  emission buffer: {np.mean([r['buffer_bytes'] for r in results]) / 1024:.1f} KB")
+
+    if failures:
+        print(f"\n{len(failures)} session(s) failed:")
+        for failure in failures[:10]:
+            print(f"  {failure}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit app")
+    parser.add_argument("--users", type=int, default=10, help="simultaneous simulated users")
+    parser.add_argument("--iterations", type=int, default=2, help="passes over the pages per user; the first is a warm-up")
+    parser.add_argument("--rows-per-user", type=int, default=500, help="seeded emissions per user")
+    parser.add_argument("--pages", default=",".join(PAGES), help="comma-separated sidebar pages to visit")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--startup-timeout", type=float, default=300, help="seconds to wait for all sessions to start")
+    parser.add_argument("--workdir", help="directory for the seeded carbon.db (default: a temp dir)")
+    args = parser.parse_args()
+    pages = [p.strip() for p in args.pages.split(",") if p.strip()]
+
+    # database.py opens ./carbon.db, so switch to the scratch directory before importing it
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="carbonf-load-"))
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+    print(f"Seeding {args.users} users in {workdir} ...")
+    emails = seed(args.users, args.rows_per_user)
+
+    # spawn, not fork: each session needs fresh Streamlit and SQLAlchemy state
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager, ProcessPoolExecutor(max_workers=args.users, mp_context=ctx) as pool:
+        barrier = manager.Barrier(args.users + 1)
+        futures = [pool.submit(simulate_user, workdir, email, pages, args.iterations, args.timeout,
+                               barrier, args.startup_timeout)
+                   for email in emails]
+        try:
+            barrier.wait(args.startup_timeout)
+        except threading.BrokenBarrierError:
+            print("Not every session started; see failures below.")
+        started = time.perf_counter()
+        results = []
+        for email, future in zip(emails, futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                results.append(dict(new_result(f"{email}: {exc!r}"), latencies={}))
+        elapsed = time.perf_counter() - started
+    failures = report(results, elapsed)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# recompute.py
+# Re-derive stored emission values from activity data and effective-dated factors.
+#
+#   python recompute.py publish --valid-from 2025-04-01   # record revised factors.py values, then recompute
+#   python recompute.py run --since 2025-01-01 --category Water
+import argparse
+from datetime import date
+
+from sqlalchemy import select, update
+
+from database import init_db, Session, Emission, EmissionFactor, publish_factors
+
+
+def recompute_emissions(session, since=None, category=None):
+    """Set value = amount * factor for every row whose effective factor changed.
+
+    One UPDATE with a correlated subquery picks, per row, the latest factor
+    whose `valid_from` is on or before the row's date. Rows without activity
+    data (logged before it was stored) are left alone. Returns rows updated.
+    """
+    e = Emission.__table__
+    f = EmissionFactor.__table__
+    factor = (
+        select(f.c.factor)
+        .where(
+            f.c.category == e.c.category,
+            f.c.subtype == e.c.subtype,
+            f.c.unit == e.c.unit,
+            f.c.valid_from <= e.c.date,
+        )
+        .order_by(f.c.valid_from.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    new_value = e.c.amount * factor
+    stmt = (
+        update(e)
+        .where(e.c.amount.isnot(None))
+        .where(e.c.value != new_value)  # NULL when no factor applies, so those rows are skipped
+        .values(value=new_value)
+    )
+    if since is not None:
+        stmt = stmt.where(e.c.date >= since)
+    if category is not None:
+        stmt = stmt.where(e.c.category == category)
+    result = session.execute(stmt)
+    session.commit()
+    return result.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute stored emissions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_publish = sub.add_parser("publish", help="record factors.py values that differ from the database")
+    p_publish.add_argument("--valid-from", type=date.fromisoformat, default=date.today())
+    p_publish.add_argument("--no-recompute", action="store_true")
+    p_run = sub.add_parser("run", help="recompute rows from the stored factors")
+    p_run.add_argument("--since", type=date.fromisoformat)
+    p_run.add_argument("--category")
+    args = parser.parse_args()
+
+    init_db()
+    session = Session()
+    try:
+        if args.command == "publish":
+            changed = publish_factors(session, args.valid_from)
+            print(f"{len(changed)} factor(s) effective from {args.valid_from}")
+            for category, subtype, unit in changed:
+                print(f"  {category} / {subtype} / {unit}")
+            if changed and not args.no_recompute:
+                updated = recompute_emissions(session, since=args.valid_from)
+                print(f"{updated} emission row(s) recomputed")
+        else:
+            updated = recompute_emissions(session, since=args.since, category=args.category)
+            print(f"{updated} emission row(s) recomputed")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
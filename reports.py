@@ -0,0 +1,49 @@
+# reports.py
+# Report content behind the "Download" page, shared with batch_reports.py.
+import io
+import zipfile
+
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+from factors import MONTHS
+
+
+def emissions_frame(records):
+    """DataFrame of Year/Month/Facility/Category/Emission from Emission rows."""
+    return pd.DataFrame([{"Year": rec.date.year, "Month": rec.date.month, "Facility": rec.facility,
+                          "Category": rec.category, "Emission": rec.value} for rec in records])
+
+
+def report_csv(df_all):
+    return df_all.to_csv(index=False).encode('utf-8')
+
+
+def report_charts(df_all):
+    """Bar, pie and monthly trend figures keyed by their file name in the ZIP."""
+    # Bar and pie
+    summary = df_all.groupby("Category")["Emission"].sum().reset_index()
+    fig_bar = px.bar(summary, x="Category", y="Emission", title="Emissions by Category", color="Category", template="plotly_white")
+    fig_pie = px.pie(summary, values="Emission", names="Category", title="Emissions Distribution", hole=0.4)
+    # Monthly trend
+    df_months = df_all.assign(MonthName=df_all["Month"].apply(lambda m: MONTHS[m-1]))
+    monthly = df_months.groupby(["Year","MonthName"])["Emission"].sum().reset_index()
+    fig1 = px.line(monthly, x="MonthName", y="Emission", color="Year", markers=True, title="Monthly Emission Trend")
+    fig1.update_xaxes(categoryorder="array", categoryarray=MONTHS)
+    return {"bar_chart.png": fig_bar, "pie_chart.png": fig_pie, "monthly_trend.png": fig1}
+
+
+def report_images(df_all):
+    """Render the charts to PNG bytes with Kaleido."""
+    return {name: pio.to_image(fig, format='png') for name, fig in report_charts(df_all).items()}
+
+
+def report_zip(csv, images):
+    """ZIP holding emissions.csv and the chart images."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        z.writestr("emissions.csv", csv.decode('utf-8'))
+        for name, img in images.items():
+            z.writestr(name, img)
+    return buf.getvalue()
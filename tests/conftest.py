@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def scratch_cwd(tmp_path, monkeypatch):
+    # database.py opens ./carbon.db; keep every test away from the real one
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point database.engine and database.Session at a fresh, initialised SQLite file."""
+    import database
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'carbon.db'}")
+    original = database.Session.kw["bind"]
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "_initialized", False)
+    database.Session.configure(bind=engine)
+    database.init_db()
+    yield engine
+    database.Session.configure(bind=original)
+    engine.dispose()
@@ -0,0 +1,36 @@
+import os
+from datetime import date
+
+from streamlit.testing.v1 import AppTest
+
+from database import Session, User, Emission, create_user
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_carbon_metre_drill_down_shows_gauges(temp_db):
+    create_user("metre", "metre@gmail.com", "secret")
+    today = date.today()
+    session = Session()
+    user_id = session.query(User.id).filter_by(email="metre@gmail.com").scalar()
+    session.add(Emission(user_id=user_id, date=date(today.year, today.month, 1),
+                         facility="Hostels", category="Water", value=4000.0))
+    session.commit()
+    session.close()
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.session_state["logged_in"] = True
+    at.session_state["user_id"] = user_id
+    at.session_state["username"] = "metre"
+    at.session_state["started"] = True
+    at.run()
+    at.sidebar.radio[0].set_value("Carbon Metre").run()
+    at.selectbox(key="metre_month").set_value(today.strftime("%B")).run()
+    assert not at.exception
+
+    at.selectbox(key="metre_drill_facility").set_value("Hostels").run()
+    next(b for b in at.button if b.label == "Show gauges").click().run()
+    assert not at.exception
+    assert at.radio(key="metre_view").value == "Facility Gauges"
+    # the gauges read the same persisted totals as the heatmap cell
+    assert any("Exceeded 2.00 tons in Water" in e.value for e in at.error)
@@ -0,0 +1,118 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import zipfile
+from datetime import date
+
+import pytest
+
+import batch_reports
+from batch_reports import build_report, parse_period, plan_jobs, safe_name
+from database import Session, User, Emission, create_user
+
+MARCH = (date(2025, 3, 1), date(2025, 4, 1))
+
+
+def fake_images(df_all):
+    return {"bar_chart.png": b"bar", "pie_chart.png": b"pie", "monthly_trend.png": b"trend"}
+
+
+@pytest.fixture
+def users(temp_db):
+    """alice: two facilities in March, bob: February only, carol: nothing."""
+    for name in ("alice", "bob", "carol"):
+        create_user(name, f"{name}@gmail.com", "secret")
+    session = Session()
+    ids = dict(session.query(User.name, User.id))
+    session.add_all([
+        Emission(user_id=ids["alice"], date=date(2025, 3, 1), facility="Hostels", category="Water", value=10.0),
+        Emission(user_id=ids["alice"], date=date(2025, 3, 1), facility="Hostels", category="Waste", value=5.0),
+        Emission(user_id=ids["alice"], date=date(2025, 3, 1), facility="Shops/Bank/PO", category="Travel", value=2.5),
+        Emission(user_id=ids["bob"], date=date(2025, 2, 1), facility="Hostels", category="Water", value=99.0),
+    ])
+    session.commit()
+    session.close()
+    return ids
+
+
+def test_month_period():
+    assert parse_period("2025-03") == ("2025-03", date(2025, 3, 1), date(2025, 4, 1))
+    assert parse_period("2025-3") == ("2025-03", date(2025, 3, 1), date(2025, 4, 1))
+
+
+def test_december_rolls_into_next_year():
+    assert parse_period("2024-12") == ("2024-12", date(2024, 12, 1), date(2025, 1, 1))
+
+
+def test_year_only():
+    assert parse_period("2025") == ("2025", date(2025, 1, 1), date(2026, 1, 1))
+
+
+@pytest.mark.parametrize("value", ["2025-13", "2025-00", "25", "2025/03", "March"])
+def test_rejects_bad_periods(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_period(value)
+
+
+def test_safe_name():
+    assert safe_name("Visitor's Hostel") == "Visitor_s_Hostel"
+    assert safe_name("Shops/Bank/PO") == "Shops_Bank_PO"
+    assert safe_name("///") == "unnamed"
+
+
+def test_plan_jobs_per_user(users, tmp_path):
+    jobs = plan_jobs(str(tmp_path), *MARCH, by_facility=False)
+    assert [(j["user"], j["facility"], len(j["records"])) for j in jobs] == [
+        ("alice", None, 3), ("bob", None, 0), ("carol", None, 0)]
+    assert jobs[0]["directory"] == os.path.join(str(tmp_path), f"{users['alice']}_alice")
+
+
+def test_plan_jobs_per_facility(users, tmp_path):
+    jobs = plan_jobs(str(tmp_path), *MARCH, by_facility=True)
+    assert [(j["user"], j["facility"], len(j["records"])) for j in jobs] == [
+        ("alice", "Hostels", 2), ("alice", "Shops/Bank/PO", 1), ("bob", None, 0), ("carol", None, 0)]
+    assert jobs[1]["directory"].endswith(os.path.join(f"{users['alice']}_alice", "Shops_Bank_PO"))
+
+
+def test_build_report_writes_csv_images_and_zip(users, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_reports, "report_images", fake_images)
+    job = plan_jobs(str(tmp_path), *MARCH, by_facility=False)[0]
+    entry = build_report(job)
+    assert entry["status"] == "ok"
+    assert entry["total_emission"] == pytest.approx(17.5)
+    assert sorted(os.listdir(job["directory"])) == sorted(entry["files"])
+    with zipfile.ZipFile(os.path.join(job["directory"], "reports.zip")) as z:
+        assert sorted(z.namelist()) == ["bar_chart.png", "emissions.csv", "monthly_trend.png", "pie_chart.png"]
+        assert z.read("emissions.csv").decode("utf-8").count("\n") == 4  # header + 3 rows
+
+
+def test_build_report_no_data_and_error(users, tmp_path, monkeypatch):
+    jobs = plan_jobs(str(tmp_path), *MARCH, by_facility=False)
+    empty = build_report(jobs[1])
+    assert (empty["status"], empty["files"]) == ("no data", [])
+    assert not os.path.exists(jobs[1]["directory"])
+
+    def broken_images(df_all):
+        raise RuntimeError("Kaleido is not installed")
+
+    monkeypatch.setattr(batch_reports, "report_images", broken_images)
+    failed = build_report(jobs[0])
+    assert failed["status"] == "error"
+    assert "Kaleido is not installed" in failed["error"]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="workers must be forked to inherit the patched renderer")
+def test_main_writes_manifest(users, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_reports, "report_images", fake_images)
+    monkeypatch.setattr(batch_reports, "warm_renderer", lambda: None)
+    out = tmp_path / "out"
+    monkeypatch.setattr(sys, "argv", ["batch_reports.py", "--period", "2025-03", "--out", str(out), "--workers", "1"])
+    assert batch_reports.main() == 0
+
+    manifest = json.loads((out / "2025-03" / "manifest.json").read_text())
+    assert (manifest["period"], manifest["start"], manifest["end"]) == ("2025-03", "2025-03-01", "2025-04-01")
+    assert [(r["user"], r["status"], r["rows"]) for r in manifest["reports"]] == [
+        ("alice", "ok", 3), ("bob", "no data", 0), ("carol", "no data", 0)]
@@ -0,0 +1,47 @@
+import weakref
+
+import pytest
+
+from emission_buffer import ROW_DTYPE, EmissionBuffer, live_buffers, register_buffer
+
+
+def test_grows_by_doubling_up_to_capacity():
+    buf = EmissionBuffer(capacity=40)
+    sizes = set()
+    for _ in range(40):
+        buf.append(2025, "May", "Hostels", "Water", 1.0)
+        sizes.add(buf.nbytes // ROW_DTYPE.itemsize)
+    assert sizes == {16, 32, 40}
+    assert len(buf) == 40
+
+
+def test_evicts_oldest_rows_when_full():
+    buf = EmissionBuffer(capacity=8)
+    for i in range(20):
+        buf.append(2025, "May", "Hostels", "Water", float(i))
+    assert len(buf) <= 8
+    assert buf.nbytes == 8 * ROW_DTYPE.itemsize
+    # the newest entries survive; with capacity 8, evicting 2 at a time leaves 12..19
+    assert buf.totals(2025, "May", "Hostels")["Water"] == pytest.approx(sum(range(12, 20)))
+
+
+def test_totals_filter_by_month_and_facility():
+    buf = EmissionBuffer()
+    buf.append(2025, "May", "Hostels", "Water", -5.0)
+    buf.append(2025, "May", "Hostels", "Waste", 3.0)
+    buf.append(2025, "June", "Hostels", "Water", 100.0)
+    buf.append(2025, "May", "Schools", "Water", 100.0)
+    totals = buf.totals(2025, "May", "Hostels")
+    assert totals["Water"] == 5.0  # absolute values, as the Carbon Metre always summed
+    assert totals["Waste"] == 3.0
+    assert totals["Travel"] == 0.0
+
+
+def test_registry_forgets_closed_sessions():
+    buf = EmissionBuffer(owner="alice")
+    register_buffer("session-1", buf)
+    assert ("session-1", buf) in live_buffers()
+    ref = weakref.ref(buf)
+    del buf
+    assert ref() is None
+    assert all(session_id != "session-1" for session_id, _ in live_buffers())
@@ -0,0 +1,42 @@
+import pytest
+
+from factors import (
+    FACTOR_TABLE, build_factor_table, compute_emission, join_subtype,
+    emission_factors, f_e_f, e_e_f, w_e_f, wa_e_f, flight_emissions, train_emission_factors,
+    personal_emission_factors, bus_emission_factors, taxi_emission_factors,
+)
+
+
+# Each case restates the arithmetic the Carbon Data forms did before factors.py existed
+@pytest.mark.parametrize("category, subtype, unit, amount, expected", [
+    ("Fossil Fuels", "CNG", "Kg", 10, 10 * emission_factors["Fossil Fuels"]["CNG"]),
+    ("Fossil Fuels", "CNG", "Tonne", 2, 2 * 1000 * emission_factors["Fossil Fuels"]["CNG"]),
+    ("Fossil Fuels", "Diesel", "litre", 5, 5 * emission_factors["Fossil Fuels per litre"]["Diesel"]),
+    ("Fossil Fuels", "PNG", "SCM", 3, 3 * emission_factors["Fossil Fuels per scm"]["PNG"]),
+    ("Fugitive", "Domestic Refrigeration", "Kg", 2, 2 * f_e_f["Domestic Refrigeration"]),
+    ("Fugitive", "Domestic Refrigeration", "Tonne", 2, 2 * 1000 * f_e_f["Domestic Refrigeration"]),
+    ("Electricity", "Coal/Thermal", "KWH", 100, 100 * e_e_f["Coal/Thermal"]),
+    ("Water", "Supplied Water", "Cubic metre", 7, 7 * w_e_f),
+    ("Water", "Treated water", "million litres", 7, 7 * 1000 * w_e_f),
+    ("Waste", join_subtype("Garden Waste", "Composting"), "Kg", 4, 4 * wa_e_f["Garden Waste"]["Composting"]),
+    ("Waste", join_subtype("Garden Waste", "Landfills"), "Tonne", 4, 4 * 1000 * wa_e_f["Garden Waste"]["Landfills"]),
+    ("Travel", join_subtype("Airways", "Long Haul"), "km", 100, 100 * flight_emissions["Long Haul"]),
+    ("Travel", join_subtype("Railways", "Metro"), "km", 100, 100 * 0.04),
+    ("Travel", join_subtype("Railways", "Diesel"), "km", 100, 100 * train_emission_factors["Diesel"]),
+    ("Travel", join_subtype("Personal", "Motorcycle"), "km", 100, 100 * personal_emission_factors["Motorcycle"]),
+    ("Travel", join_subtype("Bus", "Hydrogen"), "km", 100, 100 * bus_emission_factors["Hydrogen"]),
+    ("Travel", join_subtype("Taxi", "CNG"), "km", 100, 100 * taxi_emission_factors["CNG"]),
+])
+def test_matches_form_math(category, subtype, unit, amount, expected):
+    assert compute_emission(category, subtype, unit, amount) == pytest.approx(expected)
+
+
+def test_combinations_the_forms_rejected_have_no_factor():
+    # Petrol by the tonne and CNG by the litre never had a factor in the fossil form
+    assert compute_emission("Fossil Fuels", "Petrol/Gasoline", "Tonne", 1) is None
+    assert compute_emission("Fossil Fuels", "CNG", "litre", 1) is None
+    assert compute_emission("Water", "Supplied Water", "Choose Unit", 1) is None
+
+
+def test_build_factor_table_is_stable():
+    assert build_factor_table() == FACTOR_TABLE
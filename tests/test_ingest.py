@@ -0,0 +1,72 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from ingest import EmissionWriter, parse_reading
+
+VALID = {"facility": "Hostels", "category": "Electricity", "subtype": "Coal/Thermal",
+         "unit": "KWH", "amount": 100, "timestamp": "2025-04-30T23:59:00+00:00"}
+
+
+def test_valid_reading():
+    row = parse_reading(VALID)
+    assert row["date"] == date(2025, 4, 30)
+    assert row["value"] == pytest.approx(92.0)
+    assert (row["subtype"], row["unit"], row["amount"]) == ("Coal/Thermal", "KWH", 100)
+
+
+def test_epoch_timestamp():
+    assert parse_reading(dict(VALID, timestamp=0))["date"] == date(1970, 1, 1)
+
+
+@pytest.mark.parametrize("patch", [
+    {"facility": "Moon Base"},
+    {"category": "Vibes"},
+    {"amount": -1},
+    {"amount": "12"},
+    {"amount": True},
+    {"amount": float("nan")},
+    {"amount": float("inf")},
+    {"unit": "Tonne"},
+    {"unit": ["KWH"]},
+    {"subtype": {"a": 1}},
+    {"timestamp": "yesterday"},
+    {"timestamp": 1e20},
+    {"timestamp": None},
+])
+def test_rejects_bad_input(patch):
+    with pytest.raises(ValueError):
+        parse_reading(dict(VALID, **patch))
+
+
+def test_rejects_missing_fields_and_non_objects():
+    with pytest.raises(ValueError, match="missing field"):
+        parse_reading({"facility": "Hostels"})
+    with pytest.raises(ValueError):
+        parse_reading(["not", "an", "object"])
+
+
+def test_writer_survives_failed_insert():
+    class BrokenSession:
+        def query(self, *args):
+            raise RuntimeError("disk full")
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    async def run():
+        writer = EmissionWriter(session_factory=BrokenSession, flush_interval=0.01)
+        writer.start()
+        await writer.submit([{"category": "Water"}])
+        await asyncio.sleep(0.1)
+        await writer.submit([{"category": "Water"}, {"category": "Water"}])
+        await asyncio.sleep(0.1)
+        alive = not writer._task.done()
+        writer._task.cancel()
+        return alive, writer.failed
+
+    assert asyncio.run(run()) == (True, 3)
@@ -0,0 +1,96 @@
+import asyncio
+import base64
+import json
+from datetime import date
+
+import bcrypt
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+
+import ingest
+from database import Session, User, Emission, create_user, publish_factors
+from factors import FACTOR_TABLE
+from ingest import EmissionWriter, make_app
+
+KEY = ("Water", "Supplied Water", "Cubic metre")
+
+
+def reading(timestamp, **patch):
+    return dict({"facility": "Hostels", "category": "Water", "subtype": KEY[1], "unit": KEY[2],
+                 "amount": 100, "timestamp": timestamp}, **patch)
+
+
+def basic_auth(email, password):
+    token = base64.b64encode(f"{email}:{password}".encode("utf-8")).decode("ascii")
+    return {"Authorization": f"Basic {token}", "Content-Type": "application/json"}
+
+
+@pytest.mark.usefixtures("temp_db")
+class IngestServiceTest(AsyncHTTPTestCase):
+    def get_app(self):
+        create_user("meter", "meter@gmail.com", "secret")
+        self.writer = EmissionWriter(flush_interval=0.01)
+        self.writer.start()
+        return make_app(self.writer)
+
+    def tearDown(self):
+        self.writer._task.cancel()
+        super().tearDown()
+
+    def post(self, body, email="meter@gmail.com", password="secret"):
+        return self.fetch("/readings", method="POST", headers=basic_auth(email, password),
+                          body=body if isinstance(body, str) else json.dumps(body))
+
+    def wait_for_inserts(self, count):
+        for _ in range(200):
+            if json.loads(self.fetch("/health").body)["inserted"] >= count:
+                return
+            self.io_loop.run_sync(lambda: asyncio.sleep(0.01))
+        raise AssertionError(f"writer did not insert {count} rows")
+
+    def test_batch_is_inserted_with_the_dated_factor(self):
+        session = Session()
+        publish_factors(session, date(2025, 4, 1), {**FACTOR_TABLE, KEY: 0.5})
+        session.close()
+
+        response = self.post({"readings": [reading("2025-03-31T12:00:00+00:00"),
+                                           reading("2025-04-30T23:59:00+00:00"),
+                                           reading("2025-04-30T23:59:00+00:00", facility="Moon Base")]})
+        assert response.code == 202
+        body = json.loads(response.body)
+        assert (body["accepted"], body["rejected"]) == (2, 1)
+        assert body["errors"][0]["index"] == 2
+
+        self.wait_for_inserts(2)
+        session = Session()
+        rows = session.query(Emission.date, Emission.value, Emission.amount).order_by(Emission.date).all()
+        session.close()
+        assert [(d, a) for d, _, a in rows] == [(date(2025, 3, 31), 100), (date(2025, 4, 30), 100)]
+        assert rows[0].value == pytest.approx(100 * FACTOR_TABLE[KEY])
+        assert rows[1].value == pytest.approx(50.0)
+
+    def test_plain_list_body(self):
+        assert self.post([reading(0)]).code == 202
+
+    def test_bad_credentials_are_401(self):
+        response = self.post([reading(0)], password="wrong")
+        assert response.code == 401
+        assert "Basic" in response.headers["WWW-Authenticate"]
+        response = self.fetch("/readings", method="POST", body="[]")
+        assert response.code == 401
+
+    def test_bad_bodies_are_400_or_413(self):
+        assert self.post("not json").code == 400
+        assert self.post({"rows": []}).code == 400
+        assert self.post([reading("yesterday")]).code == 400
+        assert self.post([{}] * (ingest.MAX_BATCH + 1)).code == 413
+
+    def test_changed_password_invalidates_cached_credentials(self):
+        assert self.post([reading(0)]).code == 202
+        session = Session()
+        user = session.query(User).filter_by(email="meter@gmail.com").one()
+        user.password = bcrypt.hashpw(b"rotated", bcrypt.gensalt()).decode("utf-8")
+        session.commit()
+        session.close()
+        assert self.post([reading(0)]).code == 401
+        assert self.post([reading(0)], password="rotated").code == 202
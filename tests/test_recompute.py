@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import (
+    Base, Emission, FACTORS_EPOCH, effective_factor, factor_history, factor_on, publish_factors,
+)
+from factors import FACTOR_TABLE
+from recompute import recompute_emissions
+
+KEY = ("Water", "Supplied Water", "Cubic metre")
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'recompute.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    publish_factors(session, FACTORS_EPOCH)
+    yield session
+    session.close()
+
+
+def add_water(session, day, amount=100):
+    row = Emission(user_id=1, date=day, facility="Hostels", category="Water",
+                   value=amount * FACTOR_TABLE[KEY], subtype=KEY[1], unit=KEY[2], amount=amount)
+    session.add(row)
+    session.commit()
+    return row
+
+
+def test_revised_factor_applies_from_valid_from(session):
+    before = add_water(session, date(2025, 1, 1))
+    after = add_water(session, date(2025, 5, 1))
+    legacy = Emission(user_id=1, date=date(2025, 5, 1), facility="Hostels", category="Water", value=7.0)
+    session.add(legacy)
+    session.commit()
+
+    revised = {**FACTOR_TABLE, KEY: 0.5}
+    assert publish_factors(session, date(2025, 4, 1), revised) == [KEY]
+    assert recompute_emissions(session) == 1
+    session.expire_all()
+    assert before.value == pytest.approx(100 * FACTOR_TABLE[KEY])
+    assert after.value == pytest.approx(50.0)
+    assert legacy.value == 7.0  # no activity data, left alone
+
+
+def test_recompute_is_idempotent_and_filters(session):
+    add_water(session, date(2025, 5, 1))
+    publish_factors(session, date(2025, 4, 1), {**FACTOR_TABLE, KEY: 0.5})
+    assert recompute_emissions(session, category="Electricity") == 0
+    assert recompute_emissions(session, since=date(2025, 6, 1)) == 0
+    assert recompute_emissions(session) == 1
+    assert recompute_emissions(session) == 0
+
+
+def test_effective_factor_by_date(session):
+    publish_factors(session, date(2025, 4, 1), {**FACTOR_TABLE, KEY: 0.5})
+    history = factor_history(session)
+    assert effective_factor(history, KEY, date(2025, 3, 31)) == FACTOR_TABLE[KEY]
+    assert effective_factor(history, KEY, date(2025, 4, 1)) == 0.5
+    # keys that were never published fall back to factors.py
+    assert effective_factor({}, KEY, date(2025, 4, 1)) == FACTOR_TABLE[KEY]
+
+
+def test_factor_on_looks_up_one_key(session):
+    publish_factors(session, date(2025, 4, 1), {**FACTOR_TABLE, KEY: 0.5})
+    assert factor_on(session, KEY, date(2025, 3, 31)) == FACTOR_TABLE[KEY]
+    assert factor_on(session, KEY, date(2025, 4, 1)) == 0.5
+    assert factor_on(session, ("Water", "Rain", "Cubic metre"), date(2025, 4, 1)) is None